@@ -8,67 +8,188 @@ returns structured JSON to stdout. Designed to be called by obd2.sh.
 Safety: READ-ONLY. Only modes 01,02,03,07,09,21,22 are allowed.
 """
 
+from __future__ import annotations
+
 import argparse
 import ast
 import json
-import operator
 import os
+import pickle
+import struct
 import sys
+import tempfile
 import time
 from pathlib import Path
+from types import CodeType
+from typing import Callable, Iterator, Optional
 
+# ── JSON: orjson when available, stdlib otherwise ───────────────────
 try:
-    import obd
-    from obd import OBDCommand, OBDStatus
-    from obd.protocols import ECU
+    import orjson
+
+    def _dumpb(obj, pretty: bool = True) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+
+    _loads = orjson.loads
 except ImportError:
-    print(json.dumps({
-        "error": "python-obd not installed",
-        "fix": "pip3 install obd"
-    }), file=sys.stdout)
-    sys.exit(1)
+    def _dumpb(obj, pretty: bool = True) -> bytes:
+        return json.dumps(obj, indent=2 if pretty else None).encode()
+
+    _loads = json.loads
+
+
+def _write_json(obj, pretty: bool = True):
+    """Write obj as JSON plus newline straight to the stdout byte stream."""
+    write = sys.stdout.buffer.write
+    write(_dumpb(obj, pretty))
+    write(b"\n")
+
+
+# ── python-obd: imported on first use ───────────────────────────────
+# Pulling in obd (pyserial + the full command table) is the bulk of startup
+# time, and commands like `list` never talk to the adapter.
+obd = OBDCommand = OBDStatus = ECU = None
+
+
+def _lazy_obd():
+    """Import python-obd and bind its names at module level (once)."""
+    global obd, OBDCommand, OBDStatus, ECU
+    if obd is not None:
+        return
+    try:
+        import obd as _obd
+        from obd import OBDCommand as _OBDCommand, OBDStatus as _OBDStatus
+        from obd.protocols import ECU as _ECU
+    except ImportError:
+        _write_json({
+            "error": "python-obd not installed",
+            "fix": "pip3 install obd"
+        }, pretty=False)
+        sys.exit(1)
+    obd, OBDCommand, OBDStatus, ECU = _obd, _OBDCommand, _OBDStatus, _ECU
+
 
 # ── Safety: read-only mode whitelist ──────────────────────────────────
-ALLOWED_MODES = {"01", "02", "03", "07", "09", "21", "22"}
+ALLOWED_MODES = frozenset({"01", "02", "03", "07", "09", "21", "22"})
+
+# ── Safe formula compiler (whitelisted AST only) ─────────────────────
+_SAFE_OPS = frozenset({
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.USub, ast.UAdd,
+})
+_FORMULA_VARS = frozenset({"A", "B", "C", "D"})
+
+
+def _validate_formula(node: ast.AST):
+    """Raise ValueError unless every node is whitelisted arithmetic on A-D."""
+    if isinstance(node, ast.Expression):
+        _validate_formula(node.body)
+    elif isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        pass
+    elif isinstance(node, ast.Name) and node.id in _FORMULA_VARS:
+        pass
+    elif isinstance(node, ast.BinOp) and type(node.op) in _SAFE_OPS:
+        _validate_formula(node.left)
+        _validate_formula(node.right)
+    elif isinstance(node, ast.UnaryOp) and type(node.op) in _SAFE_OPS:
+        _validate_formula(node.operand)
+    else:
+        raise ValueError(f"Unsupported formula node: {ast.dump(node)}")
+
 
-# ── Safe formula evaluator (no eval) ─────────────────────────────────
-_SAFE_OPS = {
-    ast.Add: operator.add,
-    ast.Sub: operator.sub,
-    ast.Mult: operator.mul,
-    ast.Div: operator.truediv,
-    ast.FloorDiv: operator.floordiv,
-    ast.Mod: operator.mod,
-    ast.Pow: operator.pow,
-    ast.USub: operator.neg,
-    ast.UAdd: operator.pos,
-}
+_EMPTY_BUILTINS = {"__builtins__": {}}
 
 
-def safe_eval_formula(formula: str, variables: dict) -> float:
-    """Evaluate a simple arithmetic formula with named variables.
+def compile_formula_native(formula: str) -> CodeType:
+    """Compile a simple arithmetic formula to a CPython code object.
 
     Only supports: +, -, *, /, //, %, **, unary -, parentheses,
     numeric literals, and single-letter variable names (A-D).
     No function calls, attribute access, or anything else.
+
+    The AST is checked against the whitelist first, so re-emitting it as
+    Python source and compiling that is safe. The code is a
+    `lambda A, B, C, D: <formula>` expression; eval it once with
+    _EMPTY_BUILTINS to get the function.
     """
     tree = ast.parse(formula, mode="eval")
+    _validate_formula(tree)
+    return compile(f"lambda A, B, C, D: {ast.unparse(tree)}", "<formula>", "eval")
 
-    def _eval(node):
-        if isinstance(node, ast.Expression):
-            return _eval(node.body)
-        elif isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
-            return node.value
-        elif isinstance(node, ast.Name) and node.id in variables:
-            return variables[node.id]
-        elif isinstance(node, ast.BinOp) and type(node.op) in _SAFE_OPS:
-            return _SAFE_OPS[type(node.op)](_eval(node.left), _eval(node.right))
-        elif isinstance(node, ast.UnaryOp) and type(node.op) in _SAFE_OPS:
-            return _SAFE_OPS[type(node.op)](_eval(node.operand))
-        else:
-            raise ValueError(f"Unsupported formula node: {ast.dump(node)}")
 
-    return _eval(tree)
+def compile_formula(formula: str) -> Callable[[int, int, int, int], float]:
+    """Compile a formula into a function taking the A-D payload bytes positionally."""
+    return eval(compile_formula_native(formula), _EMPTY_BUILTINS)
+
+
+# ── Specialized decoders for common formula shapes ───────────────────
+def _is_name(node, name: str) -> bool:
+    return isinstance(node, ast.Name) and node.id == name
+
+
+def _const(node):
+    """Numeric literal value of node, or None."""
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    return None
+
+
+def _is_binop(node, op: type) -> bool:
+    return isinstance(node, ast.BinOp) and isinstance(node.op, op)
+
+
+def _match_identity(node):
+    """Match A."""
+    return () if _is_name(node, "A") else None
+
+
+def _match_offset(node):
+    """Match A - c."""
+    if _is_binop(node, ast.Sub) and _is_name(node.left, "A"):
+        c = _const(node.right)
+        if c is not None:
+            return (c,)
+    return None
+
+
+def _match_word(node):
+    """Match (A * 256 + B) / k."""
+    if _is_binop(node, ast.Div) and _is_binop(node.left, ast.Add) and _is_name(node.left.right, "B"):
+        hi = node.left.left
+        if _is_binop(hi, ast.Mult) and _is_name(hi.left, "A") and _const(hi.right) == 256:
+            k = _const(node.right)
+            if k is not None:
+                return (k,)
+    return None
+
+
+def _match_scale(node):
+    """Match (A * m) / k."""
+    if _is_binop(node, ast.Div) and _is_binop(node.left, ast.Mult) and _is_name(node.left.left, "A"):
+        m, k = _const(node.left.right), _const(node.right)
+        if m is not None and k is not None:
+            return (m, k)
+    return None
+
+
+# (matcher, builder): matcher returns captured constants or None, builder
+# turns them into a fn(A, B, C, D) with the same result as the formula.
+_PATTERNS = [
+    (_match_identity, lambda: lambda A, B, C, D: A),
+    (_match_offset, lambda c: lambda A, B, C, D, c=c: A - c),
+    (_match_word, lambda k: lambda A, B, C, D, k=k: ((A << 8) | B) / k),
+    (_match_scale, lambda m, k: lambda A, B, C, D, m=m, k=k: A * m / k),
+]
+
+
+def specialize_formula(formula: str) -> Optional[Callable[[int, int, int, int], float]]:
+    """Return a hand-written callable if the formula has a known shape."""
+    body = ast.parse(formula, mode="eval").body
+    for match, build in _PATTERNS:
+        captured = match(body)
+        if captured is not None:
+            return build(*captured)
+    return None
 
 
 SCRIPT_DIR = Path(__file__).resolve().parent
@@ -76,14 +197,76 @@ SKILL_DIR = SCRIPT_DIR.parent
 CONFIG_DIR = SKILL_DIR / "config"
 VEHICLES_DIR = CONFIG_DIR / "vehicles"
 USER_CONFIG = Path.home() / ".config" / "toyota-diag" / "config.env"
+CACHE_DIR = Path.home() / ".cache" / "toyota-diag"
+
+# Output timestamp, computed once per CLI invocation (runs are short)
+_ISO_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
+_NOW_ISO = time.strftime(_ISO_FORMAT)
+
+
+def _refresh_now() -> str:
+    """Recompute the cached output timestamp and return it."""
+    global _NOW_ISO
+    _NOW_ISO = time.strftime(_ISO_FORMAT)
+    return _NOW_ISO
 
 
 def err(msg: str, code: int = 1):
     """Print error JSON to stdout and exit."""
-    print(json.dumps({"error": msg}))
+    _write_json({"error": msg}, pretty=False)
     sys.exit(code)
 
 
+def _cached_parse(path: Path, parse: Callable[[str], dict]) -> dict:
+    """Parse a config file, reusing a pickled result while the source is unchanged.
+
+    The cache lives in CACHE_DIR and is keyed on the source path, mtime
+    and size. Any cache problem falls back to parsing the source.
+    """
+    stat = path.stat()
+    stamp = (str(path), stat.st_mtime_ns, stat.st_size)
+    cache = CACHE_DIR / f"{path.name}.pkl"
+    try:
+        with cache.open("rb") as f:
+            cached_stamp, data = pickle.load(f)
+        if cached_stamp == stamp:
+            return data
+    except Exception:
+        pass
+
+    data = parse(path.read_text())
+    tmp = None
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write aside and rename so concurrent runs never see a partial pickle
+        fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, prefix=f"{path.name}.", suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump((stamp, data), f, protocol=5)
+        os.replace(tmp, cache)
+    except OSError:
+        # Read-only home etc. — caching is best-effort
+        if tmp is not None:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+    return data
+
+
+def _parse_env(text: str) -> dict:
+    """Parse KEY=value lines from a config.env file."""
+    values = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if "=" in line:
+            key, _, val = line.partition("=")
+            val = val.strip().strip('"').strip("'")
+            values[key.strip()] = val
+    return values
+
+
 def load_config() -> dict:
     """Load config.env from user dir or skill default."""
     config = {
@@ -92,17 +275,11 @@ def load_config() -> dict:
         "VEHICLE": "rav4_xa50",
         "TIMEOUT": "10",
         "OUTPUT": "json",
+        "ELM_FAST": "1",
     }
     config_path = USER_CONFIG if USER_CONFIG.exists() else CONFIG_DIR / "config.env"
     if config_path.exists():
-        for line in config_path.read_text().splitlines():
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-            if "=" in line:
-                key, _, val = line.partition("=")
-                val = val.strip().strip('"').strip("'")
-                config[key.strip()] = val
+        config.update(_cached_parse(config_path, _parse_env))
     return config
 
 
@@ -111,22 +288,58 @@ def load_vehicle(name: str) -> dict:
     path = VEHICLES_DIR / f"{name}.json"
     if not path.exists():
         err(f"Vehicle profile not found: {path}")
-    return json.loads(path.read_text())
+    # Cached commands were built from the previous profile's PID defs
+    _CMD_CACHE.clear()
+    vehicle = _cached_parse(path, _loads)
+    _index_groups(vehicle)
+    return vehicle
+
+
+def _index_groups(vehicle: dict) -> dict:
+    """Build vehicle["_group_index"]: group name -> [(pid_name, pid_def), ...]."""
+    index = {}
+    for pid_name, pid_def in vehicle.get("pids", {}).items():
+        for group in pid_def.get("group", []):
+            index.setdefault(group, []).append((pid_name, pid_def))
+    vehicle["_group_index"] = index
+    return index
 
 
 def validate_mode(mode: str):
     """Safety gate — block write modes."""
-    mode_clean = mode.upper().lstrip("0") or "0"
     mode_padded = mode.upper().zfill(2)
     if mode_padded not in ALLOWED_MODES:
         err(f"BLOCKED: Mode {mode_padded} is not in read-only whitelist {sorted(ALLOWED_MODES)}")
 
 
+# Bytes to skip (mode echo + PID echo) before the A-D payload:
+#   Mode 01-09 response: 41 PID [A [B [C [D]]]]
+#   Mode 21/22 response: 61/62 PID_HI PID_LO [A [B [C [D]]]]
+# Anything else falls back to skipping 2.
+_OFFSET_FOR_MODE = {0x61: 3, 0x62: 3}
+_STRUCT_4B = struct.Struct("BBBB")
+
+
+# ── Build caches: compile once, reuse across polls ───────────────────
+_CMD_CACHE: dict[str, OBDCommand] = {}
+_DECODER_CACHE: dict[str, Callable] = {}
+
+
 def build_formula_decoder(pid_def: dict):
-    """Build a decoder function from a formula string like '(A * 256 + B) / 4'."""
+    """Build a decoder function from a formula string like '(A * 256 + B) / 4'.
+
+    Decoders depend only on the formula, so PIDs sharing a formula share
+    one decoder.
+    """
     formula = pid_def.get("formula", "")
-    unit = pid_def.get("unit", "")
+    decoder = _DECODER_CACHE.get(formula)
+    if decoder is None:
+        decoder = _DECODER_CACHE[formula] = _make_formula_decoder(formula)
+    return decoder
+
 
+def _make_formula_decoder(formula: str):
+    """Build an uncached decoder for build_formula_decoder."""
     if not formula or formula == "UNKNOWN":
         # Return raw hex for unknown formulas
         def raw_decoder(messages):
@@ -134,31 +347,28 @@ def build_formula_decoder(pid_def: dict):
             return d.hex()
         return raw_decoder
 
+    # Compile once per formula; common shapes skip the generic evaluator
+    try:
+        fn = specialize_formula(formula) or compile_formula(formula)
+    except (SyntaxError, ValueError) as e:
+        compile_error = f"FORMULA_ERROR: {e}"
+
+        def error_decoder(messages):
+            return compile_error
+        return error_decoder
+
     def formula_decoder(messages):
         d = messages[0].data
-        # Skip mode echo + PID echo bytes
-        # Mode 01 response: 41 PID [A [B [C [D]]]]
-        # Mode 22 response: 62 PID_HI PID_LO [A [B [C [D]]]]
-        mode_byte = d[0] if len(d) > 0 else 0
-        if mode_byte == 0x62:  # Mode 22 response
-            payload = d[3:]  # skip 62 + 2-byte PID
-        elif mode_byte == 0x61:  # Mode 21 response
-            payload = d[3:]  # skip 61 + 2-byte PID
-        elif mode_byte >= 0x41 and mode_byte <= 0x49:  # Mode 01-09 response
-            payload = d[2:]  # skip mode echo + 1-byte PID
-        else:
-            payload = d[2:]  # fallback: skip 2
+        off = _OFFSET_FOR_MODE.get(d[0], 2) if d else 2
 
         # Map A, B, C, D to payload bytes (0 if not enough bytes)
-        A = payload[0] if len(payload) > 0 else 0
-        B = payload[1] if len(payload) > 1 else 0
-        C = payload[2] if len(payload) > 2 else 0
-        D = payload[3] if len(payload) > 3 else 0
+        tail = d[off:off + 4]
+        if len(tail) < 4:
+            tail = bytes(tail) + bytes(4 - len(tail))
+        A, B, C, D = _STRUCT_4B.unpack(tail)
 
         try:
-            result = safe_eval_formula(formula, {
-                "A": A, "B": B, "C": C, "D": D
-            })
+            result = fn(A, B, C, D)
             return round(result, 2) if isinstance(result, float) else result
         except Exception as e:
             return f"FORMULA_ERROR: {e}"
@@ -167,7 +377,16 @@ def build_formula_decoder(pid_def: dict):
 
 
 def build_obd_command(pid_name: str, pid_def: dict) -> OBDCommand:
-    """Build an OBDCommand from a vehicle JSON PID definition."""
+    """Build an OBDCommand from a vehicle JSON PID definition.
+
+    Commands are cached by PID name for the loaded vehicle profile.
+    """
+    _lazy_obd()
+    key = pid_name.upper()
+    cached = _CMD_CACHE.get(key)
+    if cached is not None:
+        return cached
+
     mode = pid_def["mode"]
     pid = pid_def["pid"]
     header = pid_def.get("header", "7E0")
@@ -178,8 +397,8 @@ def build_obd_command(pid_name: str, pid_def: dict) -> OBDCommand:
     cmd_hex = f"{mode}{pid}"
     cmd_bytes = bytes.fromhex(cmd_hex) if len(cmd_hex) % 2 == 0 else cmd_hex.encode()
 
-    return OBDCommand(
-        pid_name.upper(),
+    cmd = _CMD_CACHE[key] = OBDCommand(
+        key,
         pid_def.get("name", pid_name),
         cmd_bytes,
         expected_bytes,
@@ -188,10 +407,12 @@ def build_obd_command(pid_name: str, pid_def: dict) -> OBDCommand:
         False,
         header,
     )
+    return cmd
 
 
 def connect(config: dict) -> obd.OBD:
     """Establish OBD connection."""
+    _lazy_obd()
     port = config["SERIAL_PORT"]
     baud = config["BAUD_RATE"]
     timeout = int(config.get("TIMEOUT", 10))
@@ -209,19 +430,50 @@ def connect(config: dict) -> obd.OBD:
     conn = obd.OBD(**kwargs)
     if conn.status() == OBDStatus.NOT_CONNECTED:
         err("Connection failed: adapter not found or not responding")
+    if config.get("ELM_FAST", "1") == "1":
+        _elm_fast_init(conn)
     return conn
 
 
+# Extra ELM327 init: spaces off, aggressive adaptive timing. Never send
+# ATH0 here — python-obd needs headers on to parse responses.
+_ELM_FAST_INIT = (b"ATS0", b"ATAT2")
+
+
+def _elm_fast_init(conn: obd.OBD):
+    """Send fast-response AT commands to the adapter (best-effort)."""
+    # python-obd has no public hook for custom init strings
+    send = getattr(conn.interface, "_ELM327__send", None)
+    if send is None:
+        return
+    for at_cmd in _ELM_FAST_INIT:
+        try:
+            send(at_cmd)
+        except Exception:
+            pass  # Older/clone adapters may reject these; keep defaults
+
+
 def query_pid(conn: obd.OBD, pid_name: str, pid_def: dict) -> dict:
     """Query a single PID and return structured result."""
     mode = pid_def["mode"]
     validate_mode(mode)
 
     cmd = build_obd_command(pid_name, pid_def)
-    start = time.time()
+    start = time.perf_counter_ns()
     response = conn.query(cmd, force=True)
-    elapsed_ms = round((time.time() - start) * 1000)
+    elapsed_ms = (time.perf_counter_ns() - start) // 1_000_000
+
+    val = None if response.is_null() else response.value
+    return _pid_result(pid_name, pid_def, val, elapsed_ms)
 
+
+def _pid_result(pid_name: str, pid_def: dict, val, elapsed_ms: int) -> dict:
+    """Shape a decoded PID value (None = no data) into a result dict.
+
+    Values come from formula-built decoders (plain numbers or hex strings),
+    so units always come from the PID definition.
+    """
+    mode = pid_def["mode"]
     result = {
         "pid": pid_name,
         "name": pid_def.get("name", pid_name),
@@ -232,33 +484,149 @@ def query_pid(conn: obd.OBD, pid_name: str, pid_def: dict) -> dict:
         "confidence": pid_def.get("confidence", "unknown"),
     }
 
-    if response.is_null():
+    if val is None:
         result["value"] = None
         result["status"] = "NO_DATA"
         result["raw"] = None
     else:
-        val = response.value
-        # Handle Pint quantities (from python-obd standard commands)
-        if hasattr(val, "magnitude"):
-            result["value"] = round(val.magnitude, 2) if isinstance(val.magnitude, float) else val.magnitude
-            result["unit"] = str(val.units) if hasattr(val, "units") else pid_def.get("unit", "")
-        else:
-            result["value"] = val
-            result["unit"] = pid_def.get("unit", "")
+        result["value"] = val
+        result["unit"] = pid_def.get("unit", "")
         result["status"] = "OK"
 
     return result
 
 
+# ── Multi-PID batching (Mode 01) ─────────────────────────────────────
+# SAE J1979 allows up to 6 PIDs in one Mode 01 request; the ECU answers
+# with 41 followed by <pid> <data...> for each PID it supports.
+_BATCH_MAX_PIDS = 6
+
+
+def _payload_width(pid_def: dict) -> int:
+    """Data bytes after the mode + PID echo, from the profile's "bytes" (0 if unknown)."""
+    return max(pid_def.get("bytes", 0) - 2, 0)
+
+
+def _batchable(pid_def: dict) -> bool:
+    """True for Mode 01 PIDs with a formula and a known payload length."""
+    if pid_def["mode"] != "01" or len(pid_def["pid"]) != 2:
+        return False
+    formula = pid_def.get("formula", "")
+    if not formula or formula == "UNKNOWN":
+        return False
+    return _payload_width(pid_def) > 0
+
+
+def _build_batch_command(header: str, members: list) -> OBDCommand:
+    """Build (or reuse) the OBDCommand querying several Mode 01 PIDs at once."""
+    _lazy_obd()
+    pid_bytes = bytes.fromhex("".join(pid_def["pid"] for _, pid_def in members))
+    key = f"BATCH_{header}_{pid_bytes.hex().upper()}"
+    cached = _CMD_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    widths = {pid_byte: _payload_width(pid_def)
+              for pid_byte, (_, pid_def) in zip(pid_bytes, members)}
+
+    def batch_decoder(messages):
+        # Any record we can't place exactly (unrequested PID, truncated
+        # data) means we've lost alignment: drop the whole response.
+        if not messages:
+            return None
+        d = messages[0].data
+        if not d or d[0] != 0x41:
+            return None
+        payloads = {}
+        i = 1
+        while i < len(d):
+            width = widths.get(d[i])
+            if width is None or i + 1 + width > len(d):
+                return None
+            payloads[d[i]] = bytes(d[i + 1:i + 1 + width])
+            i += 1 + width
+        return payloads
+
+    cmd = _CMD_CACHE[key] = OBDCommand(
+        key,
+        f"Batch {header} {pid_bytes.hex().upper()}",
+        b"\x01" + pid_bytes,
+        0,
+        batch_decoder,
+        ECU.ALL,
+        False,
+        header,
+    )
+    return cmd
+
+
+class _Message:
+    """Minimal stand-in for obd's Message, carrying only .data."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+def _query_batch(conn: obd.OBD, header: str, members: list) -> dict:
+    """Query Mode 01 PIDs sharing a header in one request.
+
+    Returns {pid_name: result}; PIDs missing from the combined response are
+    re-queried individually.
+    """
+    validate_mode("01")
+    cmd = _build_batch_command(header, members)
+    start = time.perf_counter_ns()
+    response = conn.query(cmd, force=True)
+    elapsed_ms = (time.perf_counter_ns() - start) // 1_000_000
+    payloads = {} if response.is_null() else response.value
+
+    results = {}
+    for pid_name, pid_def in members:
+        pid_byte = int(pid_def["pid"], 16)
+        payload = payloads.get(pid_byte)
+        if payload is None:
+            results[pid_name] = query_pid(conn, pid_name, pid_def)
+            continue
+        decoder = build_formula_decoder(pid_def)
+        val = decoder([_Message(bytes((0x41, pid_byte)) + payload)])
+        results[pid_name] = _pid_result(pid_name, pid_def, val, elapsed_ms)
+    return results
+
+
 def query_group(conn: obd.OBD, vehicle: dict, group_name: str) -> dict:
-    """Query all PIDs belonging to a group."""
-    results = []
-    pids = vehicle.get("pids", {})
+    """Query all PIDs belonging to a group.
+
+    Mode 01 PIDs sharing a header are batched up to six per request; other
+    PIDs are queried one at a time. If the ECU rejects multi-PID requests,
+    each batch costs one extra round-trip before its PIDs are re-queried
+    individually (N+1 per batch, on every run).
+    """
+    index = vehicle.get("_group_index")
+    if index is None:
+        index = _index_groups(vehicle)
+    members = index.get(group_name, [])
+
+    buckets = {}
+    for pid_name, pid_def in members:
+        if _batchable(pid_def):
+            buckets.setdefault(pid_def.get("header", "7E0"), []).append((pid_name, pid_def))
+
+    by_name = {}
+    for header, bucket in buckets.items():
+        for i in range(0, len(bucket), _BATCH_MAX_PIDS):
+            chunk = bucket[i:i + _BATCH_MAX_PIDS]
+            if len(chunk) < 2:
+                continue  # nothing to batch; falls through to the single-PID path
+            by_name.update(_query_batch(conn, header, chunk))
 
-    for pid_name, pid_def in pids.items():
-        groups = pid_def.get("group", [])
-        if group_name in groups:
-            results.append(query_pid(conn, pid_name, pid_def))
+    results = []
+    for pid_name, pid_def in members:
+        result = by_name.get(pid_name)
+        if result is None:
+            result = query_pid(conn, pid_name, pid_def)
+        results.append(result)
 
     group_info = vehicle.get("groups", {}).get(group_name, {})
     return {
@@ -267,13 +635,14 @@ def query_group(conn: obd.OBD, vehicle: dict, group_name: str) -> dict:
         "description": group_info.get("description", ""),
         "vehicle": vehicle["vehicle"]["name"],
         "alias": vehicle["vehicle"].get("alias", ""),
-        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "timestamp": _NOW_ISO,
         "results": results,
     }
 
 
 def query_dtc(conn: obd.OBD) -> dict:
     """Query diagnostic trouble codes (Mode 03 stored + Mode 07 pending)."""
+    _lazy_obd()
     results = {"stored": [], "pending": [], "status": "OK"}
 
     # Stored DTCs (Mode 03)
@@ -295,7 +664,7 @@ def query_dtc(conn: obd.OBD) -> dict:
     if not results["stored"] and not results["pending"]:
         results["status"] = "ALL_CLEAR"
 
-    results["timestamp"] = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    results["timestamp"] = _NOW_ISO
     return results
 
 
@@ -308,7 +677,7 @@ def cmd_status(conn: obd.OBD, vehicle: dict) -> dict:
         "protocol": str(conn.protocol_name()) if hasattr(conn, "protocol_name") else "unknown",
         "vehicle": vehicle["vehicle"]["name"],
         "alias": vehicle["vehicle"].get("alias", ""),
-        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "timestamp": _NOW_ISO,
     }
 
     # If connected to car (not just adapter), grab basic vitals
@@ -319,10 +688,111 @@ def cmd_status(conn: obd.OBD, vehicle: dict) -> dict:
     return info
 
 
-def cmd_scan(conn: obd.OBD, vehicle: dict, ecu_header: str = None) -> dict:
-    """Discovery scan — iterate PID ranges and report which respond."""
+# ── Raw probes: one shared OBDCommand, retargeted per query ─────────
+def _raw_hex_decoder(messages):
+    return messages[0].data.hex() if messages else None
+
+
+_SCAN_CMD = None
+
+
+def _probe_command(cmd_bytes: bytes, header: str, name: str, desc: str = "") -> OBDCommand:
+    """Point the shared raw-hex OBDCommand at new bytes/header and return it.
+
+    python-obd's OBDCommand is a plain data holder, so raw and scan queries
+    mutate one instance instead of allocating a command per request.
+    """
+    global _SCAN_CMD
+    _lazy_obd()
+    if _SCAN_CMD is None:
+        _SCAN_CMD = OBDCommand("SCAN", "", b"\x00\x00\x00", 0, _raw_hex_decoder, ECU.ALL, False, "7E0")
+    _SCAN_CMD.command = cmd_bytes
+    _SCAN_CMD.header = header
+    _SCAN_CMD.name = name
+    _SCAN_CMD.desc = desc or name
+    return _SCAN_CMD
+
+
+# Mode 01 "PIDs supported" requests: each returns a 32-bit bitmap for the
+# next 32 PIDs, with the lowest bit flagging the next support PID.
+_MODE01_SUPPORT_PIDS = range(0x00, 0x100, 0x20)
+
+
+def _scan_mode01(conn: obd.OBD, probe: OBDCommand) -> Iterator[tuple[str, str]]:
+    """Enumerate Mode 01 PIDs from the support bitmaps, then probe each one.
+
+    Yields (pid_hex, raw_response) for every PID that answered, including
+    the support PIDs themselves.
+    """
+    supported = []
+    for base in _MODE01_SUPPORT_PIDS:
+        try:
+            probe.command = bytes((0x01, base))
+            resp = conn.query(probe, force=True)
+            if resp.is_null():
+                break
+            raw = resp.value
+            # Response: 41 <pid> <4-byte bitmap>, MSB = PID base+1
+            bitmap = bytes.fromhex(raw)[2:6]
+        except Exception:
+            break  # Can't tell whether the chain continues; probe what we have
+        yield f"{base:02X}", raw
+        if len(bitmap) < 4:
+            break
+        bits = int.from_bytes(bitmap, "big")
+        supported.extend(
+            base + i + 1 for i in range(31) if bits & (1 << (31 - i))
+        )
+        if not bits & 1:
+            break  # next support PID not advertised
+
+    for pid_int in supported:
+        try:
+            probe.command = bytes((0x01, pid_int))
+            resp = conn.query(probe, force=True)
+            if resp.is_null():
+                continue
+        except Exception:
+            continue  # Skip errors during scan
+        yield f"{pid_int:02X}", resp.value
+
+
+def _scan_stride(conn: obd.OBD, probe: OBDCommand, mode: str,
+                 pid_lo: int, pid_hi: int) -> Iterator[tuple[str, str]]:
+    """Probe every 16th PID in [pid_lo, pid_hi]; yields (pid_hex, raw_response)."""
+    mode_int = int(mode, 16)
+    for pid_int in range(pid_lo, pid_hi + 1, 16):
+        # Scan in steps of 16 to avoid overwhelming the bus
+        try:
+            probe.command = bytes((mode_int, (pid_int >> 8) & 0xFF, pid_int & 0xFF))
+            resp = conn.query(probe, force=True)
+            if not resp.is_null():
+                # Only format the PID as hex for hits
+                yield f"{pid_int:04X}", resp.value
+        except Exception:
+            pass  # Skip errors during scan
+
+
+def _emit_line(obj: dict):
+    """Write one compact JSON object as an NDJSON line and flush."""
+    _write_json(obj, pretty=False)
+    sys.stdout.buffer.flush()
+
+
+def cmd_scan(conn: obd.OBD, vehicle: dict, ecu_header: str = None, stream: bool = False) -> dict:
+    """Discovery scan — iterate PID ranges and report which respond.
+
+    Mode 01 is enumerated from the standard support bitmaps (pid_range is
+    ignored); other modes are probed in strides of 16 across pid_range.
+
+    With stream=True each hit is written to stdout as a {"event": "pid_found"}
+    NDJSON line as soon as it is found, and the returned summary (event
+    "summary") carries no results list.
+    """
+    _lazy_obd()
     scan_ranges = vehicle.get("scan_ranges", {})
     results = []
+    pids_found = 0
 
     targets = {}
     if ecu_header:
@@ -331,7 +801,8 @@ def cmd_scan(conn: obd.OBD, vehicle: dict, ecu_header: str = None) -> dict:
         else:
             err(f"ECU header {ecu_header} not in scan_ranges. Available: {list(scan_ranges.keys())}")
     else:
-        targets = scan_ranges
+        # Skip annotation keys such as "_comment"
+        targets = {h: r for h, r in scan_ranges.items() if not h.startswith("_")}
 
     for header, range_def in targets.items():
         modes = range_def.get("modes", ["01"])
@@ -340,51 +811,54 @@ def cmd_scan(conn: obd.OBD, vehicle: dict, ecu_header: str = None) -> dict:
 
         print(f"Scanning ECU {header} (PIDs {pid_lo:#06x}-{pid_hi:#06x})...", file=sys.stderr)
 
-        for mode in modes:
-            validate_mode(mode)
-            for pid_int in range(pid_lo, pid_hi + 1, 16):
-                # Scan in steps of 16 to avoid overwhelming the bus
-                pid_hex = f"{pid_int:04X}"
-                cmd_hex = f"{mode}{pid_hex}"
-
-                try:
-                    cmd = OBDCommand(
-                        f"SCAN_{header}_{cmd_hex}",
-                        f"Scan {header} {cmd_hex}",
-                        bytes.fromhex(cmd_hex),
-                        0,
-                        lambda msgs: msgs[0].data.hex() if msgs else None,
-                        ECU.ALL,
-                        False,
-                        header,
-                    )
-                    resp = conn.query(cmd, force=True)
-                    if not resp.is_null():
-                        results.append({
-                            "header": header,
-                            "mode": mode,
-                            "pid": pid_hex,
-                            "command": cmd_hex,
-                            "raw_response": resp.value,
-                        })
-                        print(f"  ✓ {header} {mode} {pid_hex}: {resp.value}", file=sys.stderr)
-                except Exception:
-                    pass  # Skip errors during scan
+        # Shared probe; only its command bytes change between queries
+        probe = _probe_command(b"", header, f"SCAN_{header}", f"Scan {header}")
 
-    return {
+        for mode in modes:
+            validate_mode(mode)  # once per mode; probe loops never re-check
+            if mode == "01":
+                hits = _scan_mode01(conn, probe)
+            else:
+                hits = _scan_stride(conn, probe, mode, pid_lo, pid_hi)
+
+            # Query errors are handled inside the probe generators; output
+            # errors (e.g. a closed pipe in --stream mode) must propagate.
+            for pid_hex, raw in hits:
+                entry = {
+                    "header": header,
+                    "mode": mode,
+                    "pid": pid_hex,
+                    "command": f"{mode}{pid_hex}",
+                    "raw_response": raw,
+                }
+                pids_found += 1
+                if stream:
+                    _emit_line({"event": "pid_found", **entry})
+                else:
+                    results.append(entry)
+                print(f"  ✓ {header} {mode} {pid_hex}: {raw}", file=sys.stderr)
+
+    summary = {
         "scan": "discovery",
         "ecus_scanned": list(targets.keys()),
-        "pids_found": len(results),
-        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
-        "results": results,
+        "pids_found": pids_found,
+        "timestamp": _refresh_now(),  # scans are long-running
     }
+    if stream:
+        return {"event": "summary", **summary}
+    summary["results"] = results
+    return summary
 
 
 def cmd_list_pids(vehicle: dict) -> dict:
     """List all configured PIDs (no connection needed)."""
     pids = vehicle.get("pids", {})
     listing = []
+    counts = {"standard": 0, "unverified": 0, "speculative": 0}
     for name, defn in pids.items():
+        confidence = defn.get("confidence", "unknown")
+        if confidence in counts:
+            counts[confidence] += 1
         listing.append({
             "pid": name,
             "name": defn.get("name", name),
@@ -392,37 +866,29 @@ def cmd_list_pids(vehicle: dict) -> dict:
             "command": f"{defn['mode']}{defn['pid']}",
             "header": defn.get("header", "7E0"),
             "unit": defn.get("unit", ""),
-            "confidence": defn.get("confidence", "unknown"),
+            "confidence": confidence,
         })
     return {
         "vehicle": vehicle["vehicle"]["name"],
         "pid_count": len(listing),
-        "standard": len([p for p in listing if p["confidence"] == "standard"]),
-        "unverified": len([p for p in listing if p["confidence"] == "unverified"]),
-        "speculative": len([p for p in listing if p["confidence"] == "speculative"]),
+        "standard": counts["standard"],
+        "unverified": counts["unverified"],
+        "speculative": counts["speculative"],
         "pids": listing,
     }
 
 
 def cmd_raw(conn: obd.OBD, raw_cmd: str, header: str = "7E0") -> dict:
     """Send a raw OBD command string."""
+    _lazy_obd()
     # Extract mode from command for safety check
     mode = raw_cmd[:2]
     validate_mode(mode)
 
-    cmd = OBDCommand(
-        "RAW",
-        f"Raw command {raw_cmd}",
-        bytes.fromhex(raw_cmd),
-        0,
-        lambda msgs: msgs[0].data.hex() if msgs else None,
-        ECU.ALL,
-        False,
-        header,
-    )
-    start = time.time()
+    cmd = _probe_command(bytes.fromhex(raw_cmd), header, "RAW", f"Raw command {raw_cmd}")
+    start = time.perf_counter_ns()
     resp = conn.query(cmd, force=True)
-    elapsed_ms = round((time.time() - start) * 1000)
+    elapsed_ms = (time.perf_counter_ns() - start) // 1_000_000
 
     return {
         "command": raw_cmd,
@@ -430,7 +896,7 @@ def cmd_raw(conn: obd.OBD, raw_cmd: str, header: str = "7E0") -> dict:
         "response_time_ms": elapsed_ms,
         "raw_response": resp.value if not resp.is_null() else None,
         "status": "OK" if not resp.is_null() else "NO_DATA",
-        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "timestamp": _NOW_ISO,
     }
 
 
@@ -464,37 +930,41 @@ def main():
     # scan
     p_scan = sub.add_parser("scan", help="Discovery scan for supported PIDs")
     p_scan.add_argument("--ecu", default=None, help="Limit scan to specific ECU header")
+    p_scan.add_argument("--stream", action="store_true",
+                        help="Emit each hit as an NDJSON line, then a summary line")
 
     # list (no connection needed)
     sub.add_parser("list", help="List configured PIDs")
 
     args = parser.parse_args()
+    _refresh_now()
     config = load_config()
     vehicle = load_vehicle(config["VEHICLE"])
 
     # Commands that don't need a connection
     if args.command == "list":
-        print(json.dumps(cmd_list_pids(vehicle), indent=2))
+        _write_json(cmd_list_pids(vehicle))
         return
 
     # Commands that need a connection
     conn = connect(config)
     try:
         if args.command == "status":
-            print(json.dumps(cmd_status(conn, vehicle), indent=2))
+            _write_json(cmd_status(conn, vehicle))
         elif args.command == "group":
-            print(json.dumps(query_group(conn, vehicle, args.name), indent=2))
+            _write_json(query_group(conn, vehicle, args.name))
         elif args.command == "pid":
             pids = vehicle.get("pids", {})
             if args.name not in pids:
                 err(f"PID '{args.name}' not found. Available: {list(pids.keys())}")
-            print(json.dumps(query_pid(conn, args.name, pids[args.name]), indent=2))
+            _write_json(query_pid(conn, args.name, pids[args.name]))
         elif args.command == "dtc":
-            print(json.dumps(query_dtc(conn), indent=2))
+            _write_json(query_dtc(conn))
         elif args.command == "raw":
-            print(json.dumps(cmd_raw(conn, args.cmd, args.header), indent=2))
+            _write_json(cmd_raw(conn, args.cmd, args.header))
         elif args.command == "scan":
-            print(json.dumps(cmd_scan(conn, vehicle, args.ecu), indent=2))
+            summary = cmd_scan(conn, vehicle, args.ecu, args.stream)
+            _write_json(summary, pretty=not args.stream)
     finally:
         conn.close()
 